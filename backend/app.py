@@ -2,6 +2,7 @@ from __future__ import annotations
 import asyncio
 import os
 import threading
+import time
 import uuid
 from typing import Dict, Any, Optional, List
 
@@ -10,9 +11,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from backend.events import EventBus, Subscriber
+from backend.joblog import JobLog, sweep_logs
 from orchestrator.graph import Orchestrator
 from orchestrator.tools import LLMClient, SandboxClient
 from retrieval.index import build_index
+from training.catalog import Catalog
 
 try:
     import keyring  # type: ignore
@@ -53,43 +57,69 @@ class Job:
     def __init__(self, job_id: str):
         self.id = job_id
         self.status = "pending"
-        self.logs: List[Dict[str, Any]] = []
+        self.log = JobLog(job_id)
         self.result: Optional[Dict[str, Any]] = None
-        self._event_listeners: List[asyncio.Queue] = []
+        self.finished_at: Optional[float] = None
+        self.bus = EventBus()
+        self._lock = threading.Lock()
 
     def emit(self, event: Dict[str, Any]):
-        self.logs.append(event)
-        for q in list(self._event_listeners):
-            try:
-                q.put_nowait(event)
-            except Exception:
-                pass
+        # called from the worker thread; the bus hands events to the loop thread-safely
+        with self._lock:
+            self.bus.publish(self.log.append(event))
 
-    def subscribe(self) -> asyncio.Queue:
-        q: asyncio.Queue = asyncio.Queue()
-        self._event_listeners.append(q)
-        return q
+    def finish(self, status: str, result: Dict[str, Any]):
+        self.result = result
+        self.status = status
+        self.finished_at = time.time()
+        self.log.close()
 
-    def unsubscribe(self, q: asyncio.Queue):
-        if q in self._event_listeners:
-            self._event_listeners.remove(q)
+    def subscribe(self) -> tuple[int, Subscriber]:
+        """Return the last emitted seq and a subscriber for every event after it."""
+        with self._lock:
+            return self.log.last_seq, self.bus.subscribe()
+
+    def unsubscribe(self, sub: Subscriber):
+        self.bus.unsubscribe(sub)
 
 
 class JobManager:
-    def __init__(self):
+    def __init__(self, ttl: Optional[float] = None):
         self.jobs: Dict[str, Job] = {}
+        self.ttl = ttl if ttl is not None else float(os.getenv("JOB_TTL_SECS", "3600"))
+        self.prune_every = float(os.getenv("JOB_PRUNE_SECS", "60"))
+        self._last_prune = 0.0
 
     def create(self) -> Job:
+        self.maybe_prune()
         jid = str(uuid.uuid4())
         job = Job(jid)
         self.jobs[jid] = job
         return job
 
     def get(self, jid: str) -> Optional[Job]:
+        self.maybe_prune()
         return self.jobs.get(jid)
 
+    def maybe_prune(self) -> int:
+        if time.time() - self._last_prune < self.prune_every:
+            return 0
+        return self.prune()
+
+    def prune(self) -> int:
+        """Evict finished jobs older than the TTL, along with their spilled logs."""
+        now = self._last_prune = time.time()
+        cutoff = now - self.ttl
+        expired = [jid for jid, j in list(self.jobs.items()) if j.finished_at is not None and j.finished_at < cutoff]
+        for jid in expired:
+            job = self.jobs.pop(jid)
+            job.bus.close()
+            job.log.delete()
+        return len(expired)
+
 
 jobs = JobManager()
+catalog = Catalog()
 app = FastAPI()
 app.add_middleware(
     CORSMiddleware,
@@ -110,6 +140,16 @@ async def on_startup():
                 os.environ["OPENAI_API_KEY"] = val
         except Exception:
             pass
+    # logs of jobs from earlier server runs are not tracked by the JobManager
+    sweep_logs(jobs.ttl)
+    asyncio.get_running_loop().create_task(_prune_loop())
+
+
+async def _prune_loop():
+    # evict expired jobs even when no requests arrive
+    while True:
+        await asyncio.sleep(max(1.0, jobs.prune_every))
+        jobs.prune()
 
 
 @app.get("/health")
@@ -140,42 +180,65 @@ async def run_task(req: RunTaskReq):
             os.environ["WORKSPACE_DIR"] = req.repo_path
             orc = Orchestrator(LLMClient(), SandboxClient(), on_event=on_event)
             io = orc.run_once(goal=req.instruction)
-            job.result = {"ok": bool(io.state.get("last_result", {}).get("ok")), "state": io.state}
-            job.status = "done"
+            job.finish("done", {"ok": bool(io.state.get("last_result", {}).get("ok")), "state": io.state, "attempts": io.attempts})
         except Exception as e:
-            job.result = {"ok": False, "error": str(e)}
-            job.status = "error"
+            job.finish("error", {"ok": False, "error": str(e)})
 
     threading.Thread(target=worker, daemon=True).start()
     return JSONResponse({"job_id": job.id})
 
 
 @app.get("/tasks/{job_id}")
-async def get_task(job_id: str):
+async def get_task(job_id: str, after: int = 0, limit: int = 200):
     job = jobs.get(job_id)
     if not job:
         return JSONResponse({"error": "not_found"}, status_code=404)
-    return JSONResponse({"id": job.id, "status": job.status, "result": job.result, "logs": job.logs})
+    logs = job.log.read(after, min(max(limit, 1), 1000))
+    return JSONResponse({
+        "id": job.id,
+        "status": job.status,
+        "result": job.result,
+        "logs": logs,
+        "next": logs[-1]["seq"] if logs else after,
+        "last_seq": job.log.last_seq,
+    })
 
 
 @app.websocket("/tasks/{job_id}/stream")
-async def stream(job_id: str, ws: WebSocket):
+async def stream(job_id: str, ws: WebSocket, after: int = 0):
+    """Replay events with seq > after from the job log, then follow live events."""
     job = jobs.get(job_id)
     if not job:
         await ws.close(code=4404)
         return
     await ws.accept()
-    q = job.subscribe()
+    last_seq, sub = job.subscribe()
+    batch_size = int(os.getenv("STREAM_BATCH", "64"))
     try:
-        for evt in job.logs:
-            await ws.send_json(evt)
+        cursor = after
+        while cursor < last_seq:
+            page = [e for e in job.log.read(cursor, batch_size) if e["seq"] <= last_seq]
+            if not page:
+                break
+            await _send_events(ws, page)
+            cursor = page[-1]["seq"]
         while True:
-            evt = await q.get()
-            await ws.send_json(evt)
+            batch = await sub.get_batch(batch_size)
+            if not batch:
+                break
+            await _send_events(ws, batch)
     except WebSocketDisconnect:
         pass
     finally:
-        job.unsubscribe(q)
+        job.unsubscribe(sub)
+
+
+async def _send_events(ws: WebSocket, events: List[Dict[str, Any]]):
+    # single events go out as-is; bursts are sent as one JSON array per frame
+    if len(events) == 1:
+        await ws.send_json(events[0])
+    elif events:
+        await ws.send_json(events)
 
 
 @app.post("/rag/reindex")
@@ -204,24 +267,8 @@ async def train_dpo():
 
 @app.get("/train/datasets")
 async def dataset_counts():
-    def count_lines(path: str) -> int:
-        total = 0
-        for base, _, files in os.walk(path):
-            for f in files:
-                if f.endswith(".jsonl"):
-                    try:
-                        with open(os.path.join(base, f), "r", encoding="utf-8", errors="ignore") as fh:
-                            total += sum(1 for line in fh if line.strip())
-                    except Exception:
-                        pass
-        return total
-    root = "data"
-    return {
-        "task_to_patch": count_lines(os.path.join(root, "task_to_patch")),
-        "error_to_fix": count_lines(os.path.join(root, "error_to_fix")),
-        "api_usage": count_lines(os.path.join(root, "api_usage")),
-        "prefs": count_lines(os.path.join(root, "prefs")),
-    }
+    # counts come from the catalog's sidecar offset indexes; only appended bytes are scanned
+    return catalog.stats(["task_to_patch", "error_to_fix", "api_usage", "prefs"])
 
 
 @app.post("/adapters/load")
@@ -0,0 +1,141 @@
+"""
+thread-safe event fan-out for job streams
+
+Events are published from worker threads and handed to the subscribers' event loop
+with call_soon_threadsafe. Each subscriber owns a bounded buffer; when a slow viewer
+falls behind, consecutive text-output events (log lines, test and aider output) are
+coalesced and the oldest events are dropped so the publisher never blocks and memory
+stays bounded. The dropped marker carries the seq range that was lost so clients can
+backfill it from GET /tasks/{id}?after=.
+"""
+from __future__ import annotations
+import asyncio
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# event types (as emitted by Orchestrator.log) whose consecutive occurrences can be
+# merged by joining their text fields line by line
+COALESCE_TYPES = {"log", "test", "aider"}
+COALESCE_FIELDS = ("message", "stdout", "stderr")
+
+
+def _first_seq(evt: Dict[str, Any]) -> Optional[int]:
+    return evt.get("first_seq", evt.get("seq"))
+
+
+def _coalesce(prev: Dict[str, Any], evt: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if prev.get("type") not in COALESCE_TYPES or prev.get("type") != evt.get("type"):
+        return None
+    merged = dict(evt)
+    for key in COALESCE_FIELDS:
+        parts = [v for v in (prev.get(key), evt.get(key)) if isinstance(v, str) and v]
+        if parts:
+            merged[key] = "\n".join(parts)
+    # a merged event spans seqs first_seq..seq
+    if _first_seq(prev) is not None:
+        merged["first_seq"] = _first_seq(prev)
+    merged["coalesced"] = prev.get("coalesced", 1) + 1
+    return merged
+
+
+class Subscriber:
+    """Bounded per-viewer buffer. Only touched from the event loop thread."""
+
+    def __init__(self, maxsize: int, policy: str = "coalesce"):
+        self.maxsize = max(1, maxsize)
+        self.policy = policy  # coalesce | drop
+        self.dropped = 0
+        self._dropped_seqs: Tuple[Optional[int], Optional[int]] = (None, None)
+        self.closed = False
+        self._buf: Deque[Dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+
+    def put(self, evt: Dict[str, Any]):
+        if self.closed:
+            return
+        if self.policy == "coalesce" and self._buf:
+            merged = _coalesce(self._buf[-1], evt)
+            if merged is not None:
+                self._buf[-1] = merged
+                self._ready.set()
+                return
+        if len(self._buf) >= self.maxsize:
+            lost = self._buf.popleft()
+            first, _ = self._dropped_seqs
+            self._dropped_seqs = (first if first is not None else _first_seq(lost), lost.get("seq"))
+            self.dropped += 1
+        self._buf.append(evt)
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def get_batch(self, max_items: int = 64) -> List[Dict[str, Any]]:
+        """Wait for at least one event and return up to max_items buffered events.
+
+        Returns an empty list once the subscriber is closed and drained.
+        """
+        while not self._buf and not self.closed:
+            self._ready.clear()
+            await self._ready.wait()
+        batch: List[Dict[str, Any]] = []
+        if self.dropped:
+            first, last = self._dropped_seqs
+            batch.append({"type": "dropped", "count": self.dropped, "first_seq": first, "last_seq": last})
+            self.dropped = 0
+            self._dropped_seqs = (None, None)
+        while self._buf and len(batch) < max_items:
+            batch.append(self._buf.popleft())
+        return batch
+
+
+class EventBus:
+    """Fan-out from any thread to subscribers living on one asyncio loop."""
+
+    def __init__(self, maxsize: Optional[int] = None, policy: Optional[str] = None):
+        self.maxsize = maxsize or int(os.getenv("STREAM_BUFFER", "256"))
+        self.policy = policy or os.getenv("STREAM_POLICY", "coalesce")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # replaced (never mutated) so publishers can read it without a lock
+        self._subscribers: Tuple[Subscriber, ...] = ()
+        self._lock = threading.Lock()
+
+    def publish(self, evt: Dict[str, Any]):
+        targets = self._subscribers
+        loop = self._loop
+        if not targets or loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._deliver, targets, evt)
+        except RuntimeError:
+            # loop shut down between the check and the call
+            pass
+
+    @staticmethod
+    def _deliver(targets: Tuple[Subscriber, ...], evt: Dict[str, Any]):
+        for sub in targets:
+            sub.put(evt)
+
+    def subscribe(self, maxsize: Optional[int] = None) -> Subscriber:
+        """Register a subscriber; must be called from the loop that will consume it."""
+        self._loop = asyncio.get_running_loop()
+        sub = Subscriber(maxsize or self.maxsize, self.policy)
+        with self._lock:
+            self._subscribers = self._subscribers + (sub,)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        sub.close()
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not sub)
+
+    def close(self):
+        with self._lock:
+            subs, self._subscribers = self._subscribers, ()
+        for sub in subs:
+            loop = self._loop
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(sub.close)
@@ -0,0 +1,117 @@
+"""
+bounded per-job event log with disk spill
+
+Recent events live in an in-memory ring buffer; every event is also appended to a
+JSONL file under JOB_LOG_DIR so older pages can be served from disk. Events carry a
+monotonically increasing `seq` used for cursor pagination and stream resume.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+JOB_LOG_DIR = os.getenv("JOB_LOG_DIR", ".ai_jobs")
+# one byte offset is remembered every CHECKPOINT_EVERY events to seek into the spill file
+CHECKPOINT_EVERY = 256
+
+
+class JobLog:
+    def __init__(self, job_id: str, ring_size: Optional[int] = None, log_dir: Optional[str] = None):
+        self.path = os.path.join(log_dir or JOB_LOG_DIR, f"{job_id}.jsonl")
+        self.last_seq = 0
+        self._ring: Deque[Dict[str, Any]] = deque(maxlen=ring_size or int(os.getenv("JOB_LOG_RING", "500")))
+        self._checkpoints: List[int] = []  # offset of seq 1, 1 + CHECKPOINT_EVERY, ...
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._fh = open(self.path, "ab")
+        self._offset = self._fh.tell()
+
+    def append(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.last_seq += 1
+            evt = {**event, "seq": self.last_seq}
+            if (self.last_seq - 1) % CHECKPOINT_EVERY == 0:
+                self._checkpoints.append(self._offset)
+            if self._fh is not None:
+                line = (json.dumps(evt, default=str) + "\n").encode("utf-8")
+                self._fh.write(line)
+                self._fh.flush()
+                self._offset += len(line)
+            self._ring.append(evt)
+            return evt
+
+    def read(self, after: int = 0, limit: int = 200) -> List[Dict[str, Any]]:
+        """Return up to `limit` events with seq > after, oldest first."""
+        after = max(0, after)
+        with self._lock:
+            if after >= self.last_seq or limit <= 0:
+                return []
+            first_in_ring = self._ring[0]["seq"] if self._ring else self.last_seq + 1
+            if after + 1 >= first_in_ring:
+                start = after + 1 - first_in_ring
+                return [self._ring[i] for i in range(start, min(len(self._ring), start + limit))]
+            ckpt = after // CHECKPOINT_EVERY
+            if ckpt >= len(self._checkpoints):
+                return []
+            offset, seq = self._checkpoints[ckpt], ckpt * CHECKPOINT_EVERY
+        return self._read_disk(offset, seq, after, limit)
+
+    def _read_disk(self, offset: int, seq: int, after: int, limit: int) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        try:
+            with open(self.path, "rb") as fh:
+                fh.seek(offset)
+                for line in fh:
+                    seq += 1
+                    if seq <= after:
+                        continue
+                    try:
+                        out.append(json.loads(line))
+                    except ValueError:
+                        continue
+                    if len(out) >= limit:
+                        break
+        except OSError:
+            pass
+        return out
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def delete(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def sweep_logs(max_age: float, log_dir: Optional[str] = None) -> int:
+    """Delete job logs under log_dir not written to for max_age seconds; returns the count.
+
+    Jobs only live in memory, so logs left by a previous server process are never
+    pruned with their job and are swept at startup instead.
+    """
+    log_dir = log_dir or JOB_LOG_DIR
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(log_dir))
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.name.endswith(".jsonl"):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
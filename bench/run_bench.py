@@ -0,0 +1,177 @@
+"""
+benchmarks for the indexing, retrieval and patch paths
+
+    python -m bench.run_bench run --sizes 1000,10000 --out eval/baselines/latest.json
+    python -m bench.run_bench compare eval/baselines/base.json eval/baselines/latest.json
+
+`run` generates a synthetic repo per size, times build_index, query_symbols,
+RetrievalClient.search, SandboxClient.apply_patch (fenced blocks) and
+SandboxClient._extract_fenced_blocks, and records throughput and peak traced memory.
+Timing and memory are measured in separate passes because tracemalloc slows code down.
+build_index handles roughly 50 files/s, so one pass over 100k files takes about half an
+hour; sizes above --large run a single timing pass, reuse the warm-up index build as
+the build_index timing and skip the memory pass.
+`compare` exits non-zero when any benchmark got slower (or peaked higher) than the
+threshold; sub-millisecond timing noise is ignored via --min-ms.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from bench.synth import fenced_patch, generate_repo
+from orchestrator.tools import Patch, RetrievalClient, SandboxClient
+from retrieval.index import build_index, query_symbols
+
+BASELINE_DIR = os.path.join("eval", "baselines")
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    best, out = float("inf"), None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def _peak_kb(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_size(size: int, workdir: str, repeat: int, memory: bool) -> List[Dict[str, Any]]:
+    """Time (and optionally trace) every benchmark on a synthetic repo of `size` files."""
+    repo = os.path.join(workdir, f"repo_{size}")
+    t0 = time.perf_counter()
+    stats = generate_repo(repo, size)
+    print(f"[{size}] generated {stats['files']} files / {stats['lines']} lines in {time.perf_counter() - t0:.1f}s")
+
+    patch_files = [f"patched/file_{i}.py" for i in range(min(50, max(1, size // 100)))]
+    patch_text = fenced_patch(patch_files)
+    sandbox = SandboxClient()
+    # the warm-up build doubles as the build_index timing when only one pass is wanted
+    build_seconds, n_symbols = _time(lambda: build_index(repo), 1)
+    cases: List[Tuple[str, Callable[[], Any], float, str]] = [
+        ("build_index", lambda: build_index(repo), size, "files/s"),
+        ("query_symbols", lambda: query_symbols("handler", k=8), n_symbols, "symbols/s"),
+        ("retrieval_search", lambda: RetrievalClient(repo).search("no-such-token-anywhere"), size, "files/s"),
+        ("extract_fenced_blocks", lambda: SandboxClient._extract_fenced_blocks(patch_text), len(patch_text), "bytes/s"),
+        # apply_patch writes fenced blocks relative to the cwd, which run() sets to workdir
+        ("apply_patch", lambda: sandbox.apply_patch(Patch(repo_path=workdir, diff=patch_text)), len(patch_files), "files/s"),
+    ]
+    rows = []
+    for name, fn, units, unit_name in cases:
+        if name == "build_index" and repeat <= 1:
+            seconds = build_seconds
+        else:
+            seconds, _ = _time(fn, repeat)
+        row: Dict[str, Any] = {
+            "bench": name,
+            "size": size,
+            "seconds": seconds,
+            "throughput": units / seconds if seconds > 0 else None,
+            "unit": unit_name,
+            "repeat": repeat,
+        }
+        if memory:
+            row["peak_kb"] = _peak_kb(fn)
+        print(f"[{size}] {name:<22} {seconds * 1000:10.2f} ms  {row['throughput'] or 0:14.0f} {unit_name}"
+              + (f"  peak {row['peak_kb']:.0f} KiB" if memory else ""))
+        rows.append(row)
+    shutil.rmtree(repo, ignore_errors=True)
+    return rows
+
+
+def run(args: argparse.Namespace) -> int:
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    prev_cwd = os.getcwd()
+    out_path = os.path.abspath(args.out)
+    rows: List[Dict[str, Any]] = []
+    try:
+        # index and patch writes go to the cwd; keep them out of the real repo
+        os.chdir(workdir)
+        for size in sizes:
+            large = size > args.large
+            if large:
+                print(f"[{size}] above --large {args.large}: 1 timing pass, no memory pass")
+            rows.extend(bench_size(size, workdir, 1 if large else args.repeat, not args.no_memory and not large))
+    finally:
+        os.chdir(prev_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "large": args.large,
+        },
+        "results": rows,
+    }
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {out_path}")
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        base = {(r["bench"], r["size"]): r for r in json.load(f)["results"]}
+    with open(args.current, "r", encoding="utf-8") as f:
+        cur = {(r["bench"], r["size"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    for key in sorted(cur.keys() & base.keys(), key=lambda k: (k[1], k[0])):
+        b, c = base[key]["seconds"], cur[key]["seconds"]
+        change = (c - b) / b if b > 0 else 0.0
+        flag = ""
+        if change > args.threshold and (c - b) * 1000 >= args.min_ms:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key[0]:<22} {key[1]:>7}  {b * 1000:10.2f} -> {c * 1000:10.2f} ms  {change:+7.1%}{flag}")
+        if "peak_kb" in base[key] and "peak_kb" in cur[key] and base[key]["peak_kb"] > 0:
+            mem_change = (cur[key]["peak_kb"] - base[key]["peak_kb"]) / base[key]["peak_kb"]
+            if mem_change > args.threshold:
+                print(f"{'':<31}peak memory {mem_change:+7.1%}  REGRESSION")
+                regressions += 1
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark indexing, retrieval and patch paths.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_run = sub.add_parser("run", help="run benchmarks and write a JSON baseline")
+    p_run.add_argument("--sizes", default="1000,10000", help="comma-separated file counts (e.g. 1000,10000,100000)")
+    p_run.add_argument("--repeat", type=int, default=3, help="timing runs per benchmark; the best is kept")
+    p_run.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory pass")
+    p_run.add_argument("--large", type=int, default=20000,
+                       help="sizes above this get one timing pass and no memory pass (build_index ~50 files/s)")
+    p_run.add_argument("--out", default=os.path.join(BASELINE_DIR, "latest.json"))
+    p_run.set_defaults(func=run)
+    p_cmp = sub.add_parser("compare", help="flag benchmarks that regressed between two baselines")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown as a fraction (0.2 = 20%%)")
+    p_cmp.add_argument("--min-ms", type=float, default=1.0, help="ignore slowdowns smaller than this many ms")
+    p_cmp.set_defaults(func=compare)
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+synthetic Python repo generator for benchmarks
+
+Generates deterministic repos of a given file count with nested classes and long
+modules, laid out in packages of FILES_PER_PACKAGE modules each.
+"""
+from __future__ import annotations
+import os
+import random
+from typing import Dict, List
+
+FILES_PER_PACKAGE = 100
+# identifiers sprinkled through the code so queries have something to find
+VOCAB = ["request", "session", "cache", "parser", "token", "handler", "config", "worker", "index", "client"]
+
+
+def _method(rng: random.Random, name: str, indent: str, body_lines: int) -> List[str]:
+    word = rng.choice(VOCAB)
+    lines = [f"{indent}def {name}(self, {word}, *args, **kwargs):", f'{indent}    """Handle {word} for {name}."""']
+    for i in range(body_lines):
+        lines.append(f"{indent}    {word}_{i} = {word} if {word} else {i}  # {rng.choice(VOCAB)}")
+    lines.append(f"{indent}    return {word}")
+    return lines
+
+
+def _class(rng: random.Random, name: str, indent: str, methods: int, depth: int, body_lines: int) -> List[str]:
+    lines = [f"{indent}class {name}:", f'{indent}    """Synthetic class {name}."""']
+    for m in range(methods):
+        lines.extend(_method(rng, f"{rng.choice(VOCAB)}_{name.lower()}_{m}", indent + "    ", body_lines))
+    if depth > 1:
+        lines.extend(_class(rng, f"{name}Inner", indent + "    ", methods, depth - 1, body_lines))
+    return lines
+
+
+def generate_module(rng: random.Random, idx: int, classes: int, methods: int, depth: int, body_lines: int) -> str:
+    lines = ['"""synthetic module"""', "import os", ""]
+    for c in range(classes):
+        lines.extend(_class(rng, f"C{idx}_{c}", "", methods, depth, body_lines))
+        lines.append("")
+    for f in range(methods):
+        word = rng.choice(VOCAB)
+        lines.append(f"def {word}_fn_{idx}_{f}({word}):")
+        lines.append(f"    return os.path.join(str({word}), {f!r})")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate_repo(
+    root: str,
+    files: int,
+    classes: int = 3,
+    methods: int = 6,
+    depth: int = 3,
+    body_lines: int = 4,
+    seed: int = 0,
+) -> Dict[str, int]:
+    """Write `files` Python modules under root; returns file, line and byte counts."""
+    rng = random.Random(seed)
+    total_lines = total_bytes = 0
+    for i in range(files):
+        pkg = os.path.join(root, f"pkg_{i // FILES_PER_PACKAGE:04d}")
+        if i % FILES_PER_PACKAGE == 0:
+            os.makedirs(pkg, exist_ok=True)
+        text = generate_module(rng, i, classes, methods, depth, body_lines)
+        with open(os.path.join(pkg, f"mod_{i % FILES_PER_PACKAGE:03d}.py"), "w", encoding="utf-8") as fh:
+            fh.write(text)
+        total_lines += text.count("\n") + 1
+        total_bytes += len(text)
+    return {"files": files, "lines": total_lines, "bytes": total_bytes}
+
+
+def fenced_patch(files: List[str], lines_per_file: int = 200) -> str:
+    """Build a fenced-block patch replacing each of `files` with generated content."""
+    blocks = []
+    for n, path in enumerate(files):
+        body = "\n".join(f"value_{n}_{i} = {i}" for i in range(lines_per_file))
+        blocks.append(f"```{path}\n{body}\n```")
+    return "\n\n".join(blocks)
@@ -1,99 +1,201 @@
 """
-runs up to 20 seeded tasks, logs pass rate, attempts, time, lines changed
+runs up to 20 seeded tasks, logs pass rate, attempts, time, change metrics
+
+Each task runs in its own isolated workspace materialized from a Snapshot of the repo
+(see eval/snapshot.py), so results do not depend on task order. Every worker keeps one
+workspace and resets it between tasks. With --workers > 1 tasks run in a process pool
+(the orchestrator works relative to the current directory, so workers must be
+processes, not threads). Per-task results are streamed to eval/results/run_<ts>.jsonl
+as they finish.
 """
 from __future__ import annotations
+import argparse
+import difflib
 import json
 import os
-import random
 import shutil
 import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from typing import Any, Dict, List, Optional
+from eval.snapshot import Snapshot, make_snapshot
 from orchestrator.graph import Orchestrator
 from orchestrator.tools import LLMClient, SandboxClient
+from training.catalog import Dataset
 
 
-def load_tasks(path: str) -> list[dict]:
-    tasks = []
-    for root, _, files in os.walk(path):
-        for f in files:
-            if not f.endswith(".json") and not f.endswith(".jsonl"):
-                continue
-            fp = os.path.join(root, f)
-            with open(fp, "r", encoding="utf-8") as fh:
-                if f.endswith(".jsonl"):
-                    for line in fh:
-                        if line.strip():
-                            tasks.append(json.loads(line))
-                else:
-                    tasks.append(json.load(fh))
-    return tasks
-
-
-def count_repo_lines(root: str) -> int:
-    total = 0
-    for base, _, files in os.walk(root):
-        for f in files:
-            if f.endswith((".py", ".md", ".txt")):
-                try:
-                    with open(os.path.join(base, f), "r", encoding="utf-8", errors="ignore") as fh:
-                        total += sum(1 for _ in fh)
-                except Exception:
-                    pass
-    return total
-
-
-def main():
-    random.seed(0)
-    tasks = load_tasks("data/task_to_patch")
-    random.shuffle(tasks)
-    tasks = tasks[:20]
-
-    tmpdir = tempfile.mkdtemp(prefix="eval_repo_")
-    # copy current repo to tmpdir
-    for item in os.listdir("."):
-        if item in {".git", "__pycache__", "dist", "build"}:
+def load_tasks(path: str, limit: int, seed: int) -> list[dict]:
+    """Seeded sample of `limit` tasks, reading only the sampled records."""
+    return Dataset(path).sample(limit, seed=seed)
+
+
+def _read_lines(path: str) -> Optional[List[str]]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return fh.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return None  # missing or binary
+
+
+def _same_file(a: str, b: str) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def change_metrics(snapshot: Snapshot, workspace: str) -> Dict[str, int]:
+    """Lines added/removed, files touched and hunks versus the snapshot.
+
+    Only files whose stat differs from the snapshot are read and diffed. The old side
+    is read from the source repo, which is only valid because workspaces hold private
+    copies (see Snapshot.shared) and patches are swapped in atomically. A changed
+    file that still shares its inode with the source was written in place through a
+    hardlink; its old contents are gone, so it is counted under shared_writes.
+    """
+    modified, added, deleted = snapshot.changes(workspace)
+    stats = {
+        "files_touched": len(modified) + len(added) + len(deleted),
+        "lines_added": 0,
+        "lines_removed": 0,
+        "hunks": 0,
+        "shared_writes": 0,
+    }
+    added_set, deleted_set = set(added), set(deleted)
+    for rel in modified + added + deleted:
+        if rel in modified and _same_file(os.path.join(snapshot.root, rel), os.path.join(workspace, rel)):
+            stats["shared_writes"] += 1
             continue
-        src = os.path.join(".", item)
-        dst = os.path.join(tmpdir, item)
-        try:
-            if os.path.isdir(src):
-                shutil.copytree(src, dst)
-            else:
-                shutil.copy2(src, dst)
-        except Exception:
-            pass
+        old = _read_lines(os.path.join(snapshot.root, rel)) if rel not in added_set else []
+        new = _read_lines(os.path.join(workspace, rel)) if rel not in deleted_set else []
+        if old is None or new is None:
+            continue
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+            if tag == "equal":
+                continue
+            stats["hunks"] += 1
+            stats["lines_removed"] += i2 - i1
+            stats["lines_added"] += j2 - j1
+    return stats
 
-    os.chdir(tmpdir)
 
-    orc = Orchestrator(LLMClient(), SandboxClient())
+# per-process state set by _init_worker: the snapshot and this worker's workspace
+_snapshot: Optional[Snapshot] = None
+_workspace: Optional[str] = None
 
-    passes = 0
-    results = []
+
+def _init_worker(snapshot: Snapshot, workspaces_dir: str):
+    global _snapshot, _workspace
+    _snapshot = snapshot
+    _workspace = os.path.join(workspaces_dir, f"w{os.getpid()}")
+    snapshot.materialize(_workspace)
+
+
+def run_task(index: int, task: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one task in this worker's workspace, reset to the snapshot first."""
+    assert _snapshot is not None and _workspace is not None
+    goal = task.get("prompt") or task.get("goal") or str(task)
+    prev_cwd = os.getcwd()
     t0 = time.time()
-    for i, t in enumerate(tasks, 1):
-        goal = t.get("prompt") or t.get("goal") or str(t)
-        before = count_repo_lines(".")
-        io = orc.run_once(goal=goal)
-        after = count_repo_lines(".")
+    stages: Dict[str, float] = {}
+    try:
+        _snapshot.reset(_workspace)
+        stages["reset"] = time.time() - t0
+        os.chdir(_workspace)
+        os.environ["WORKSPACE_DIR"] = _workspace
+        llm = LLMClient()
+        io = Orchestrator(llm, SandboxClient()).run_once(goal=goal)
+        stages.update(io.timings)
+        t1 = time.time()
+        changes = change_metrics(_snapshot, _workspace)
+        stages["metrics"] = time.time() - t1
         ok = bool(io.state.get("last_result", {}).get("ok"))
-        passes += 1 if ok else 0
-        results.append({
+        return {
+            "index": index,
             "goal": goal,
             "ok": ok,
-            "lines_changed": after - before,
+            "lines_changed": changes["lines_added"] - changes["lines_removed"],
+            "changes": changes,
+            "stages": stages,
+            "llm": dict(llm.usage),
+            "attempts": io.attempts,
+            "seconds": time.time() - t0,
             "state": io.state,
-        })
-        print(f"Task {i}: {'PASS' if ok else 'FAIL'}")
+        }
+    except Exception as e:
+        return {"index": index, "goal": goal, "ok": False, "error": str(e), "stages": stages, "seconds": time.time() - t0}
+    finally:
+        os.chdir(prev_cwd)
 
-    rate = passes / max(1, len(results))
-    os.makedirs("eval/results", exist_ok=True)
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Evaluate the orchestrator on seeded tasks.")
+    parser.add_argument("--tasks", default="data/task_to_patch", help="directory of .json/.jsonl tasks")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("EVAL_WORKERS", "1")),
+                        help="number of tasks to run concurrently (process pool when > 1)")
+    parser.add_argument("--include", action="append", default=[],
+                        help="glob of files to copy into workspaces (repeatable; default: everything)")
+    parser.add_argument("--exclude", action="append", default=[],
+                        help="extra glob to leave out of workspaces (repeatable)")
+    args = parser.parse_args(argv)
+
+    tasks = load_tasks(args.tasks, args.limit, args.seed)
+
+    src_root = os.getcwd()
+    results_dir = os.path.join(src_root, "eval", "results")
+    os.makedirs(results_dir, exist_ok=True)
     ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    latest_path = "eval/results/latest.json"
-    with open(f"eval/results/run_{ts}.json", "w", encoding="utf-8") as f:
-        json.dump({"pass_rate": rate, "results": results, "seconds": time.time() - t0}, f, indent=2)
-    with open(latest_path, "w", encoding="utf-8") as f:
-        json.dump({"pass_rate": rate, "results": results, "seconds": time.time() - t0}, f, indent=2)
+    stream_path = os.path.join(results_dir, f"run_{ts}.jsonl")
+
+    results = []
+    t0 = time.time()
+    snapshot = make_snapshot(src_root, include=args.include, exclude=args.exclude)
+    workspaces_dir = tempfile.mkdtemp(prefix="eval_ws_")
+    print(f"Snapshot: {len(snapshot.files)} files in {time.time() - t0:.2f}s")
+    with open(stream_path, "w", encoding="utf-8") as stream:
+        def record(res: Dict[str, Any]):
+            results.append(res)
+            stream.write(json.dumps(res, default=str) + "\n")
+            stream.flush()
+            print(f"Task {res['index']}: {'PASS' if res['ok'] else 'FAIL'}")
+
+        try:
+            if args.workers <= 1:
+                _init_worker(snapshot, workspaces_dir)
+                for i, t in enumerate(tasks, 1):
+                    record(run_task(i, t))
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=args.workers, initializer=_init_worker, initargs=(snapshot, workspaces_dir)
+                ) as pool:
+                    futures = [pool.submit(run_task, i, t) for i, t in enumerate(tasks, 1)]
+                    for fut in as_completed(futures):
+                        record(fut.result())
+        finally:
+            shutil.rmtree(workspaces_dir, ignore_errors=True)
+
+    results.sort(key=lambda r: r["index"])
+    passes = sum(1 for r in results if r["ok"])
+    rate = passes / max(1, len(results))
+    totals: Dict[str, float] = {}
+    for r in results:
+        for key, val in r.get("changes", {}).items():
+            totals[key] = totals.get(key, 0) + val
+        for key, val in r.get("llm", {}).items():
+            totals[f"llm_{key}"] = totals.get(f"llm_{key}", 0) + val
+    summary = {
+        "pass_rate": rate,
+        "results": results,
+        "totals": totals,
+        "seconds": time.time() - t0,
+        "workers": args.workers,
+    }
+    for path in (os.path.join(results_dir, f"run_{ts}.json"), os.path.join(results_dir, "latest.json")):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, default=str)
     print(f"Pass rate: {rate:.2%}")
 
 
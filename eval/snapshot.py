@@ -0,0 +1,185 @@
+"""
+cheap repo snapshots for eval workspaces
+
+A Snapshot walks the source repo once (honouring include/exclude rules) and records
+each file's size and mtime. Materializing a workspace reflinks every file (or copies
+it, when the filesystem cannot reflink), so a task's edits stay private to its
+workspace. Only an explicit allowlist of read-only inputs (data/, binary assets) is
+hardlinked. Resetting a used workspace only stats files and restores the ones that
+changed, instead of copying the tree again.
+"""
+from __future__ import annotations
+import fnmatch
+import os
+import shutil
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl  # type: ignore
+except Exception:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+FICLONE = 0x40049409  # linux ioctl: share extents with another file (btrfs, xfs, ...)
+
+DEFAULT_EXCLUDE = [
+    ".git", "node_modules", "src-tauri", "dist", "build", "__pycache__", ".pytest_cache",
+    ".mypy_cache", ".ruff_cache", ".venv", "venv", ".ai_index", ".ai_jobs", "eval/results",
+]
+# read-only inputs that are safe to share with the source repo through a hardlink;
+# everything else gets a private copy because patches may rewrite it
+DEFAULT_SHARED = [
+    "data/*", "*.png", "*.jpg", "*.jpeg", "*.gif", "*.ico", "*.icns", "*.woff", "*.woff2",
+    "*.ttf", "*.pdf", "*.zip", "*.gz",
+]
+
+_reflink_ok = fcntl is not None
+
+
+def _matches(rel: str, patterns: Sequence[str]) -> bool:
+    name = rel.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatch(rel, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def _reflink(src: str, dst: str) -> bool:
+    global _reflink_ok
+    if not _reflink_ok:
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    except OSError:
+        _reflink_ok = False  # filesystem does not support it; stop trying
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+@dataclass
+class Snapshot:
+    root: str
+    include: List[str] = field(default_factory=list)
+    exclude: List[str] = field(default_factory=lambda: list(DEFAULT_EXCLUDE))
+    shared: List[str] = field(default_factory=lambda: list(DEFAULT_SHARED))
+    files: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # rel path -> (size, mtime_ns)
+    dirs: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.root = os.path.abspath(self.root)
+        if not self.files:
+            self.scan()
+
+    def scan(self):
+        self.files, self.dirs = {}, []
+        for base, dirnames, filenames in os.walk(self.root):
+            rel_base = os.path.relpath(base, self.root).replace(os.sep, "/")
+            rel_base = "" if rel_base == "." else rel_base + "/"
+            dirnames[:] = [d for d in dirnames if not _matches(rel_base + d, self.exclude)]
+            self.dirs.extend(rel_base + d for d in dirnames)
+            for f in filenames:
+                rel = rel_base + f
+                if _matches(rel, self.exclude) or (self.include and not _matches(rel, self.include)):
+                    continue
+                try:
+                    st = os.stat(os.path.join(base, f))
+                except OSError:
+                    continue
+                self.files[rel] = (st.st_size, st.st_mtime_ns)
+
+    def _place(self, rel: str, dst_root: str):
+        src = os.path.join(self.root, rel)
+        dst = os.path.join(dst_root, rel)
+        if _matches(rel, self.shared):
+            try:
+                os.link(src, dst)
+                return
+            except OSError:
+                pass
+        if not _reflink(src, dst):
+            shutil.copy2(src, dst)
+
+    def materialize(self, dst_root: str):
+        os.makedirs(dst_root, exist_ok=True)
+        for d in self.dirs:
+            os.makedirs(os.path.join(dst_root, d), exist_ok=True)
+        for rel in self.files:
+            try:
+                self._place(rel, dst_root)
+            except OSError:
+                continue
+
+    def changes(self, dst_root: str) -> Tuple[List[str], List[str], List[str]]:
+        """Return (modified, added, deleted) paths in a workspace, by stat only."""
+        modified: List[str] = []
+        added: List[str] = []
+        seen = set()
+        for base, dirnames, filenames in os.walk(dst_root):
+            rel_base = os.path.relpath(base, dst_root).replace(os.sep, "/")
+            rel_base = "" if rel_base == "." else rel_base + "/"
+            dirnames[:] = [d for d in dirnames if not _matches(rel_base + d, self.exclude)]
+            for f in filenames:
+                rel = rel_base + f
+                if rel not in self.files:
+                    if not _matches(rel, self.exclude):
+                        added.append(rel)
+                    continue
+                seen.add(rel)
+                try:
+                    st = os.stat(os.path.join(base, f))
+                except OSError:
+                    continue
+                if (st.st_size, st.st_mtime_ns) != self.files[rel]:
+                    modified.append(rel)
+        deleted = [rel for rel in self.files if rel not in seen]
+        return modified, added, deleted
+
+    def reset(self, dst_root: str) -> int:
+        """Bring a materialized workspace back to the snapshot; returns files restored."""
+        if not os.path.isdir(dst_root):
+            self.materialize(dst_root)
+            return len(self.files)
+        known_dirs = set(self.dirs)
+        seen = set()
+        for base, dirnames, filenames in os.walk(dst_root):
+            rel_base = os.path.relpath(base, dst_root).replace(os.sep, "/")
+            rel_base = "" if rel_base == "." else rel_base + "/"
+            for d in list(dirnames):
+                if rel_base + d not in known_dirs:
+                    shutil.rmtree(os.path.join(base, d), ignore_errors=True)
+                    dirnames.remove(d)
+            for f in filenames:
+                rel = rel_base + f
+                if rel in self.files:
+                    seen.add(rel)
+                else:
+                    os.remove(os.path.join(base, f))
+        restored = 0
+        for rel, (size, mtime_ns) in self.files.items():
+            dst = os.path.join(dst_root, rel)
+            if rel in seen:
+                try:
+                    st = os.stat(dst)
+                    if st.st_size == size and st.st_mtime_ns == mtime_ns:
+                        continue
+                except OSError:
+                    pass
+                os.remove(dst)
+            os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+            try:
+                self._place(rel, dst_root)
+                restored += 1
+            except OSError:
+                continue
+        return restored
+
+
+def make_snapshot(root: str, include: Optional[Sequence[str]] = None, exclude: Optional[Sequence[str]] = None) -> Snapshot:
+    return Snapshot(
+        root=root,
+        include=list(include or []),
+        exclude=list(DEFAULT_EXCLUDE) + list(exclude or []),
+    )
@@ -0,0 +1,149 @@
+"""
+lightweight command-line entry point
+
+    python -m orchestrator.cli query "parse config" -k 5
+    python -m orchestrator.cli reindex path/to/repo
+    python -m orchestrator.cli run-task --repo path/to/repo --goal "Fix failing pytest tests"
+    python -m orchestrator.cli eval --workers 4
+    python -m orchestrator.cli --profile-startup query add
+
+Only argparse is imported up front. Each command imports what it needs when it runs,
+so query and reindex never load the LLM providers or the web stack. With
+--profile-startup the command is re-run under `python -X importtime` and the slowest
+imports are reported.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from typing import List, Optional
+
+PROFILE_FLAG = "--profile-startup"
+
+
+def _load_env():
+    try:
+        from dotenv import load_dotenv  # type: ignore
+    except Exception:
+        return
+    load_dotenv()
+
+
+def cmd_query(args: argparse.Namespace) -> int:
+    import json
+    from retrieval.index import query_symbols
+
+    for hit in query_symbols(args.query, k=args.k):
+        if args.json:
+            print(json.dumps(hit))
+        else:
+            print(f"{hit.get('path')}:{hit.get('start')}-{hit.get('end')}  {hit.get('kind')} {hit.get('name')}")
+    return 0
+
+
+def cmd_reindex(args: argparse.Namespace) -> int:
+    from retrieval.index import INDEX_FILE, build_index
+
+    count = build_index(args.root)
+    print(f"Index written to {INDEX_FILE} with {count} symbols.")
+    return 0
+
+
+def cmd_run_task(args: argparse.Namespace) -> int:
+    import json
+
+    _load_env()
+    if args.max_iters is not None:
+        os.environ["MAX_ITERS"] = str(args.max_iters)
+    if args.repo:
+        os.environ["WORKSPACE_DIR"] = args.repo
+    from orchestrator.graph import Orchestrator
+    from orchestrator.tools import LLMClient, SandboxClient
+
+    io = Orchestrator(LLMClient(), SandboxClient()).run_once(goal=args.goal)
+    print("\n--- STATE ---")
+    print(json.dumps(io.state, indent=2, default=str))
+    return 0 if io.state.get("last_result", {}).get("ok") else 1
+
+
+def cmd_eval(args: argparse.Namespace) -> int:
+    _load_env()
+    from eval.run_eval import main as eval_main
+
+    eval_main(args.eval_args)
+    return 0
+
+
+def profile_startup(argv: List[str]) -> int:
+    """Re-run argv under -X importtime and print the slowest imports by cumulative time."""
+    import subprocess
+
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "orchestrator.cli", *argv],
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    wall = time.perf_counter() - t0
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            sys.stderr.write(line + "\n")
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header row
+        rows.append((int(parts[1]), int(parts[0]), parts[2][1:].rstrip()))
+    top_level = sum(cum for cum, _, name in rows if not name.startswith(" "))
+    print(f"\n--- startup profile: {wall * 1000:.0f} ms wall, {top_level / 1000:.0f} ms in imports ({len(rows)} modules) ---",
+          file=sys.stderr)
+    for cum, self_us, name in sorted(rows, reverse=True)[:15]:
+        print(f"{cum / 1000:8.1f} ms cumulative {self_us / 1000:8.1f} ms self  {name.strip()}", file=sys.stderr)
+    return proc.returncode
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m orchestrator.cli", description="AI Coder command line.")
+    parser.add_argument(PROFILE_FLAG, action="store_true", help="report import times for the command")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("query", help="query the symbol index")
+    p.add_argument("query")
+    p.add_argument("-k", type=int, default=8)
+    p.add_argument("--json", action="store_true", help="print full hits as JSON lines")
+    p.set_defaults(func=cmd_query)
+
+    p = sub.add_parser("reindex", help="rebuild the symbol index")
+    p.add_argument("root", nargs="?", default=os.getenv("WORKSPACE_DIR") or ".")
+    p.set_defaults(func=cmd_reindex)
+
+    p = sub.add_parser("run-task", help="run one plan-retrieve-edit-test task")
+    p.add_argument("--goal", required=True)
+    p.add_argument("--repo", default=None, help="workspace dir (defaults to WORKSPACE_DIR or cwd)")
+    p.add_argument("--max-iters", type=int, default=None)
+    p.set_defaults(func=cmd_run_task)
+
+    # arguments after "eval" are split off in main(); argparse.REMAINDER does not
+    # capture leading options inside a subparser
+    p = sub.add_parser("eval", help="run eval.run_eval; remaining args are passed through", add_help=False)
+    p.set_defaults(func=cmd_eval, eval_args=[])
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if PROFILE_FLAG in argv:
+        argv.remove(PROFILE_FLAG)
+        return profile_startup(argv)
+    if argv and argv[0] == "eval":
+        args = build_parser().parse_args(argv[:1])
+        rest = argv[1:]
+        args.eval_args = rest[1:] if rest[:1] == ["--"] else rest
+    else:
+        args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,13 @@ plan→retrieve→edit→test loop
 Implements an iterative loop with planning, retrieval, implementation, testing, and
 optional repair using model-proposed patches.
 """
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from typing import Dict, Any, List, Optional, Callable
+import hashlib
 import os
+import re
+import time
 
 from .tools import LLMClient, SandboxClient, AiderWrapper
 from retrieval.index import query_symbols, build_index
@@ -17,6 +21,36 @@ class NodeIO:
     goal: str
     state: Dict[str, Any]
     logs: List[str]
+    timings: Dict[str, float] = field(default_factory=dict)  # seconds per stage, summed over iterations
+    attempts: List[Dict[str, Any]] = field(default_factory=list)  # compact per-patch history
+    seen_patches: Dict[str, str] = field(default_factory=dict)  # normalized patch hash -> failure signature
+
+
+_FAILED_RE = re.compile(r"^(?:FAILED|ERROR) (\S+)", re.M)
+_EXC_RE = re.compile(r"^(?:E\s+|\S+:\d+: )([A-Za-z_][\w.]*(?:Error|Exception|Exit|Interrupt))\b", re.M)
+HISTORY_LIMIT = 6
+
+
+def patch_key(diff: str) -> str:
+    """Hash a patch ignoring whitespace-only differences and unified-diff index lines."""
+    lines = []
+    for line in diff.replace("\r\n", "\n").splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("index "):
+            continue
+        lines.append(line)
+    return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def failure_signature(result: Dict[str, Any]) -> str:
+    """Failing test ids plus exception types from a test run, e.g. 'tests/t.py::test_x AssertionError'."""
+    if result.get("ok"):
+        return "ok"
+    out = (result.get("stdout") or "") + "\n" + (result.get("stderr") or "")
+    tests = sorted(set(_FAILED_RE.findall(out)))
+    excs = sorted(set(_EXC_RE.findall(out)))
+    sig = " ".join(tests[:5] + excs[:3])
+    return sig or f"exit {result.get('code')}"
 
 
 class Orchestrator:
@@ -35,9 +69,20 @@ class Orchestrator:
             self.on_event({"type": evt_type, "message": msg, **kw})
         print(msg)
 
+    @contextmanager
+    def _stage(self, io: NodeIO, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            io.timings[name] = io.timings.get(name, 0.0) + time.perf_counter() - t0
+
     def _plan(self, io: NodeIO) -> Dict[str, Any]:
         system = "You are a planning agent. Produce a short next step with {action,target,notes}. Return JSON only."
         user = f"Goal: {io.goal}\nState: {io.state}"
+        history = self._history(io)
+        if history:
+            user += f"\nPrevious attempts (do not repeat failed patches):\n{history}"
         step = self.llm.complete_json(system, user)
         self.log(io, f"Plan: {step}", evt_type="plan", plan=step)
         return step
@@ -54,15 +99,39 @@ class Orchestrator:
         self.log(io, f"Retrieved {len(snippets)} snippets for query '{q}'.", evt_type="retrieve", count=len(snippets))
         return snippets
 
-    def _implement(self, io: NodeIO, task: str, snippets: List[Dict[str, Any]], trace: Optional[str] = None) -> bool:
-        patch = self.llm.propose_patch(task, snippets, trace)
+    def _history(self, io: NodeIO) -> str:
+        return "\n".join(
+            f"- iter {a['iter']} {a['stage']}: patch {a['patch']} -> {a['result']}" for a in io.attempts[-HISTORY_LIMIT:]
+        )
+
+    def _implement(self, io: NodeIO, task: str, snippets: List[Dict[str, Any]], trace: Optional[str] = None) -> Optional[str]:
+        """Propose and apply a patch; returns its key, or None if the same patch was already tried."""
+        patch = self.llm.propose_patch(task, snippets, trace, history=self._history(io))
+        key = patch_key(patch.diff)
+        if key in io.seen_patches:
+            self.log(io, f"Skipping duplicate patch {key[:8]} (already failed: {io.seen_patches[key]})", evt_type="patch_duplicate")
+            return None
         if self.use_aider and self.aider:
             out = self.aider.run(patch.diff)
             self.log(io, f"Aider output: {out[:500]}", evt_type="aider")
         ok = self.sandbox.apply_patch(patch)
         self.log(io, f"Patch applied: {ok}", evt_type="patch", diff=patch.diff)
         # commit only if tests will pass later; we keep staging but commit on green
-        return ok
+        return key
+
+    def _attempt(self, io: NodeIO, iteration: int, stage: str, snippets: List[Dict[str, Any]], trace: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Implement then test; duplicate patches skip the test run and return None."""
+        with self._stage(io, stage):
+            key = self._implement(io, io.goal, snippets, trace)
+        if key is None:
+            io.attempts.append({"iter": iteration, "stage": stage, "patch": "duplicate", "result": "skipped"})
+            return None
+        with self._stage(io, "test"):
+            result = self._test(io)
+        io.state["last_result"] = result
+        io.seen_patches[key] = failure_signature(result)
+        io.attempts.append({"iter": iteration, "stage": stage, "patch": key[:8], "result": io.seen_patches[key]})
+        return result
 
     def _git_commit(self, message: str):
         try:
@@ -79,25 +148,29 @@ class Orchestrator:
 
     def run_once(self, goal: str, init_state: Optional[Dict[str, Any]] = None) -> NodeIO:
         io = NodeIO(goal=goal, state=init_state or {}, logs=[])
+        self.llm.scope = goal
         for attempt in range(1, self.max_iters + 1):
             self.log(io, f"--- Iteration {attempt}/{self.max_iters} ---", evt_type="iter")
-            step = self._plan(io)
-            snippets = self._retrieve(io, step)
-            self._implement(io, goal, snippets)
-            result = self._test(io)
-            io.state["last_result"] = result
-            if result.get("ok"):
+            with self._stage(io, "plan"):
+                step = self._plan(io)
+            with self._stage(io, "retrieve"):
+                snippets = self._retrieve(io, step)
+            result = self._attempt(io, attempt, "implement", snippets)
+            if result and result.get("ok"):
                 self._git_commit(f"AI patch: {goal[:60]}")
                 self.log(io, "Green build!", evt_type="done")
                 break
             # repair using trace
-            trace = (result.get("stdout", "") + "\n" + result.get("stderr", "")).strip()
-            self._implement(io, goal, snippets, trace=trace)
-            result = self._test(io)
-            io.state["last_result"] = result
-            if result.get("ok"):
+            last = io.state.get("last_result") or {}
+            trace = (last.get("stdout", "") + "\n" + last.get("stderr", "")).strip()
+            repaired = self._attempt(io, attempt, "repair", snippets, trace=trace or None)
+            if repaired and repaired.get("ok"):
                 self._git_commit(f"AI patch: {goal[:60]}")
                 self.log(io, "Green build after repair!", evt_type="done")
                 break
+            if result is None and repaired is None:
+                # the model only repeats patches that already failed; more iterations won't help
+                self.log(io, "No new patches proposed; stopping.", evt_type="stalled")
+                break
         return io
 
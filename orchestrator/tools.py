@@ -1,27 +1,50 @@
 """
-openai/ollama calls, docker run, aider wrapper
+openai/ollama calls, llm record/replay, docker run, aider wrapper
 
 This module centralizes external tool integrations so orchestrator.graph is testable.
 Implementations are minimal; extend as your stack evolves.
 """
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+import hashlib
 import json
 import os
+import re
 import subprocess
+import sys
 import tempfile
 import glob
+import threading
+import time
 
 try:
-    from openai import OpenAI  # type: ignore
-except Exception:  # pragma: no cover
-    OpenAI = None  # fallback when not installed
+    import fcntl  # type: ignore
+except Exception:  # pragma: no cover - Windows
+    fcntl = None
 
 try:
-    import requests  # type: ignore
-except Exception:  # pragma: no cover
-    requests = None
+    import msvcrt  # type: ignore
+except Exception:
+    msvcrt = None
+
+# openai and requests are slow to import and optional; load them on first use so
+# importing this module (e.g. from the CLI) stays cheap.
+def _load_openai():
+    try:
+        from openai import OpenAI  # type: ignore
+    except Exception:  # pragma: no cover
+        return None  # fallback when not installed
+    return OpenAI
+
+
+def _load_requests():
+    try:
+        import requests  # type: ignore
+    except Exception:  # pragma: no cover
+        return None
+    return requests
 
 
 # ---------------------- Data types ----------------------
@@ -31,12 +54,149 @@ class Patch:
     diff: str  # unified diff string or fenced code blocks
 
 
+# ---------------------- LLM record/replay ----------------------
+_TIMING_RE = re.compile(r"\bin \d+(?:\.\d+)?s\b")  # pytest summary, e.g. "1 failed in 0.04s"
+_ADDR_RE = re.compile(r"\b0x[0-9a-fA-F]{6,}\b")
+
+
+def _normalize_prompt(text: str) -> str:
+    """Strip run-specific text (workspace roots, timings, addresses) so prompts hash stably."""
+    roots = {os.path.abspath(r) for r in (os.getenv("WORKSPACE_DIR"), os.getcwd()) if r}
+    for root in sorted(roots, key=len, reverse=True):
+        if root == os.path.dirname(root):
+            continue  # never strip a filesystem root
+        text = text.replace(root + os.sep, "").replace(root, ".")
+    text = _TIMING_RE.sub("in <t>s", text)
+    return _ADDR_RE.sub("0x?", text)
+
+
+def _prompt_key(kind: str, system: str, user: str) -> str:
+    text = _normalize_prompt(f"{kind}\0{system}\0{user}")
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class LLMRecorder:
+    """Appends every prompt/response pair to a JSONL file (LLM_RECORD).
+
+    Eval workers are separate processes, so appends take an OS-level file lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, record: Dict[str, Any]):
+        data = (json.dumps(record) + "\n").encode("utf-8")
+        with self._lock, open(self.path, "ab") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                fh.write(data)
+                fh.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class ReplayMiss(LookupError):
+    """Raised in strict replay (LLM_REPLAY_STRICT=true) when a prompt has no recording."""
+
+
+class ReplayLLM:
+    """Serves recorded responses (LLM_REPLAY) instead of calling a model.
+
+    A prompt is matched by the hash of its normalized text first. Failing that, the
+    next unused recording of the same kind and scope (the task goal) is served, so a
+    recorded task replays in order and never receives another task's responses.
+    Latency can be simulated with a fixed per-call delay (LLM_REPLAY_LATENCY seconds)
+    plus a token rate (LLM_REPLAY_TOKENS_PER_SEC applied to the recorded completion
+    tokens). One instance is shared per process and recording (see shared()).
+    """
+
+    _shared: Dict[str, "ReplayLLM"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str, latency: float = 0.0, tokens_per_sec: float = 0.0):
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self._records: List[Dict[str, Any]] = []
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    self._records.append(json.loads(line))
+        self._by_key: Dict[str, Deque[int]] = {}
+        for i, rec in enumerate(self._records):
+            self._by_key.setdefault(rec.get("key", ""), deque()).append(i)
+        self._used = set()
+        self._cursor: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, path: str, latency: float = 0.0, tokens_per_sec: float = 0.0) -> "ReplayLLM":
+        with cls._shared_lock:
+            inst = cls._shared.get(path)
+            if inst is None:
+                inst = cls._shared[path] = cls(path, latency, tokens_per_sec)
+            return inst
+
+    def _take(self, kind: str, key: str, scope: Optional[str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            q = self._by_key.get(key)
+            while q:
+                i = q.popleft()
+                if i not in self._used:
+                    self._used.add(i)
+                    return self._records[i]
+            pos = self._cursor.get((kind, scope), 0)
+            while pos < len(self._records):
+                rec = self._records[pos]
+                pos += 1
+                if rec.get("kind") == kind and rec.get("scope") == scope and pos - 1 not in self._used:
+                    self._used.add(pos - 1)
+                    self._cursor[(kind, scope)] = pos
+                    return rec
+            self._cursor[(kind, scope)] = pos
+            return None
+
+    def serve(self, kind: str, system: str, user: str, scope: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        rec = self._take(kind, _prompt_key(kind, system, user), scope)
+        if rec is not None:
+            delay = self.latency
+            if self.tokens_per_sec > 0:
+                delay += (rec.get("completion_tokens") or 0) / self.tokens_per_sec
+            if delay > 0:
+                time.sleep(delay)
+        return rec
+
+
 # ---------------------- LLM Client ----------------------
 class LLMClient:
-    """Unified LLM client for OpenAI or Ollama."""
+    """Unified LLM client for OpenAI or Ollama.
+
+    Set LLM_RECORD=<path.jsonl> to record every prompt/response, or
+    LLM_REPLAY=<path.jsonl> to serve a recording offline (see ReplayLLM).
+    """
 
     def __init__(self, smart: Optional[str] = None, fast: Optional[str] = None):
-        self.use_openai = bool(os.getenv("OPENAI_API_KEY")) and OpenAI is not None
+        replay_path = os.getenv("LLM_REPLAY")
+        self.replay = ReplayLLM.shared(
+            replay_path,
+            latency=float(os.getenv("LLM_REPLAY_LATENCY", "0")),
+            tokens_per_sec=float(os.getenv("LLM_REPLAY_TOKENS_PER_SEC", "0")),
+        ) if replay_path else None
+        self.recorder = LLMRecorder(os.environ["LLM_RECORD"]) if os.getenv("LLM_RECORD") and not replay_path else None
+        # set by the orchestrator to the current goal; groups recordings per task for replay
+        self.scope: Optional[str] = None
+        self.replay_strict = os.getenv("LLM_REPLAY_STRICT", "false").lower() == "true"
+        openai_cls = _load_openai() if os.getenv("OPENAI_API_KEY") and self.replay is None else None
+        self.use_openai = openai_cls is not None
         self.ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
         self.smart_model = smart or os.getenv("SMART_MODEL") or (
             "gpt-4o-mini" if self.use_openai else os.getenv("LOCAL_LLM", "qwen2.5-coder:7b-instruct-q4_K_M")
@@ -44,11 +204,30 @@ class LLMClient:
         self.fast_model = fast or os.getenv("FAST_MODEL") or (
             "gpt-4o-mini" if self.use_openai else os.getenv("LOCAL_LLM", "qwen2.5-coder:7b-instruct-q4_K_M")
         )
-        self._client = OpenAI() if self.use_openai else None
+        self._client = openai_cls() if openai_cls is not None else None
+        # running totals across calls; latency is wall-clock seconds spent waiting on the model
+        self.usage: Dict[str, float] = {
+            "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "seconds": 0.0, "errors": 0,
+        }
+        if self.replay is not None:
+            self.usage["replay_misses"] = 0
+
+    def _record_usage(self, started: float, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        self.usage["calls"] += 1
+        self.usage["prompt_tokens"] += prompt_tokens or 0
+        self.usage["completion_tokens"] += completion_tokens or 0
+        self.usage["seconds"] += time.perf_counter() - started
+
+    def _record_failure(self, started: float, before: Dict[str, float]):
+        # failed or timed-out calls still cost wall time; count them unless the provider already did
+        self.usage["errors"] += 1
+        if self.usage["calls"] == before["calls"]:
+            self._record_usage(started, None, None)
 
     # --------------- low-level ---------------
     def _openai_chat(self, system: str, user: str, model: str, temperature: float) -> str:
         assert self._client is not None
+        started = time.perf_counter()
         resp = self._client.chat.completions.create(
             model=model,
             messages=[
@@ -57,10 +236,16 @@ class LLMClient:
             ],
             temperature=temperature,
         )
+        self._record_openai_usage(started, resp)
         return (resp.choices[0].message.content or "").strip()
 
+    def _record_openai_usage(self, started: float, resp: Any):
+        usage = getattr(resp, "usage", None)
+        self._record_usage(started, getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None))
+
     def _openai_json(self, system: str, user: str, model: str) -> Dict[str, Any]:
         assert self._client is not None
+        started = time.perf_counter()
         resp = self._client.chat.completions.create(
             model=model,
             messages=[
@@ -70,6 +255,7 @@ class LLMClient:
             temperature=0,
             response_format={"type": "json_object"},
         )
+        self._record_openai_usage(started, resp)
         text = (resp.choices[0].message.content or "{}").strip()
         try:
             return json.loads(text)
@@ -77,6 +263,7 @@ class LLMClient:
                 return {"raw": text}
 
     def _ollama_chat(self, system: str, user: str, model: str, temperature: float) -> str:
+        requests = _load_requests()
         if requests is None:
             return ""
         url = f"{self.ollama_host}/api/chat"
@@ -89,9 +276,11 @@ class LLMClient:
             "options": {"temperature": temperature},
             "stream": False,
         }
+        started = time.perf_counter()
         r = requests.post(url, json=payload, timeout=600)
         r.raise_for_status()
         data = r.json()
+        self._record_usage(started, data.get("prompt_eval_count"), data.get("eval_count"))
         msg = data.get("message", {}).get("content") or ""
         return msg.strip()
 
@@ -110,25 +299,79 @@ class LLMClient:
     # --------------- public API ---------------
     def complete(self, system: str, user: str, temperature: float = 0.2, fast: bool = True) -> str:
         model = self.fast_model if fast else self.smart_model
+        if self.replay is not None:
+            rec = self._replayed("chat", system, user)
+            return (rec.get("response") or "") if rec else ""
+        started, before = time.perf_counter(), dict(self.usage)
+        fallback = False
         try:
             if self.use_openai:
-                return self._openai_chat(system, user, model, temperature)
+                text = self._openai_chat(system, user, model, temperature)
             else:
-                return self._ollama_chat(system, user, model, temperature)
+                text = self._ollama_chat(system, user, model, temperature)
         except Exception:
-            return ""
+            text, fallback = "", True
+            self._record_failure(started, before)
+        self._recorded("chat", system, user, model, text, fallback, started, before)
+        return text
 
     def complete_json(self, system: str, user: str) -> Dict[str, Any]:
         model = self.smart_model
+        if self.replay is not None:
+            rec = self._replayed("json", system, user)
+            if rec and isinstance(rec.get("response"), dict):
+                return rec["response"]
+            return {"action": "implement", "target": "tests", "notes": "offline-fallback"}
+        started, before = time.perf_counter(), dict(self.usage)
+        fallback = False
         try:
             if self.use_openai:
-                return self._openai_json(system, user, model)
+                data = self._openai_json(system, user, model)
             else:
-                return self._ollama_json(system, user, model)
+                data = self._ollama_json(system, user, model)
         except Exception:
-            return {"action": "implement", "target": "tests", "notes": "offline-fallback"}
+            data, fallback = {"action": "implement", "target": "tests", "notes": "offline-fallback"}, True
+            self._record_failure(started, before)
+        self._recorded("json", system, user, model, data, fallback, started, before)
+        return data
+
+    def _replayed(self, kind: str, system: str, user: str) -> Optional[Dict[str, Any]]:
+        assert self.replay is not None
+        started = time.perf_counter()
+        rec = self.replay.serve(kind, system, user, self.scope)
+        if rec is not None:
+            self._record_usage(started, rec.get("prompt_tokens"), rec.get("completion_tokens"))
+            return rec
+        # a miss means the recording is stale for this prompt; never substitute output silently
+        self.usage["replay_misses"] += 1
+        msg = f"LLM replay miss: no {kind} recording for key {_prompt_key(kind, system, user)[:12]} (scope {self.scope!r})"
+        if self.replay_strict:
+            raise ReplayMiss(msg)
+        print(msg, file=sys.stderr)
+        return None
+        return rec
+
+    def _recorded(self, kind: str, system: str, user: str, model: str, response: Any, fallback: bool,
+                  started: float, before: Dict[str, float]):
+        if self.recorder is None:
+            return
+        self.recorder.write({
+            "kind": kind,
+            "scope": self.scope,
+            "key": _prompt_key(kind, system, user),
+            "model": model,
+            "system": system,
+            "user": user,
+            "response": response,
+            "fallback": fallback,
+            "prompt_tokens": self.usage["prompt_tokens"] - before["prompt_tokens"],
+            "completion_tokens": self.usage["completion_tokens"] - before["completion_tokens"],
+            "seconds": time.perf_counter() - started,
+        })
 
-    def propose_patch(self, task: str, snippets: List[Dict[str, Any]], trace: Optional[str] = None) -> Patch:
+    def propose_patch(
+        self, task: str, snippets: List[Dict[str, Any]], trace: Optional[str] = None, history: Optional[str] = None
+    ) -> Patch:
         sys_msg = (
             "You are an expert software engineer. Propose the smallest safe change to satisfy the task.\n"
             "Output a patch using one of the following formats:\n"
@@ -148,6 +391,8 @@ class LLMClient:
         )
         if trace:
             user_msg += f"\n\nTest/Run trace:\n{trace}\n"
+        if history:
+            user_msg += f"\n\nPrevious attempts (these patches failed; propose something different):\n{history}\n"
         text = self.complete(sys_msg, user_msg, temperature=0.2, fast=False)
         if text and (text.startswith("diff --git") or "```" in text):
             return Patch(repo_path=os.getcwd(), diff=text.strip())
@@ -236,12 +481,27 @@ class SandboxClient:
         applied_any = False
         blocks = self._extract_fenced_blocks(text)
         for path, content in blocks:
-            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-            with open(path, "w", encoding="utf-8") as fh:
-                fh.write(content)
+            self._write_atomic(path, content)
             applied_any = True
         return applied_any
 
+    @staticmethod
+    def _write_atomic(path: str, content: str):
+        # write a new file and swap it in, so a hardlinked target's shared inode is never truncated
+        folder = os.path.dirname(path) or "."
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix=".patch_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(content)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
     @staticmethod
     def _extract_fenced_blocks(text: str) -> List[tuple[str, str]]:
         blocks: List[tuple[str, str]] = []
@@ -10,10 +10,4 @@ if (-not $Root -or -not (Test-Path $Root)) {
 Write-Host "Rebuilding symbol index for $Root ..." -ForegroundColor Cyan
 
 $env:PYTHONPATH = "$PSScriptRoot\.."
-python - << 'PY'
-import os, json
-from retrieval.index import build_index
-root = os.environ.get("WORKSPACE_DIR") or os.getcwd()
-index_path, n = build_index(root)
-print(f"Index written to {index_path} with {n} symbols.")
-PY
+python -m orchestrator.cli reindex "$Root"
@@ -7,9 +7,23 @@ interface StreamEvent {
   stdout?: string
   stderr?: string
   diff?: any
+  seq?: number
+  first_seq?: number
+  last_seq?: number
   cost?: { calls?: number; tokens?: number }
 }
 
+// GET /tasks/{id} serves at most this many events per page
+const BACKFILL_PAGE = 1000
+
+// backfilled events arrive after newer live ones; keep the timeline ordered by seq
+function insertBySeq(tl: StreamEvent[], evt: StreamEvent): StreamEvent[] {
+  if (evt.seq == null) return [...tl, evt]
+  let i = tl.length
+  while (i > 0 && (tl[i - 1].seq ?? 0) > evt.seq) i--
+  return [...tl.slice(0, i), evt, ...tl.slice(i)]
+}
+
 export function Tasks({ base, defaultRepo, onError }: { base: string; defaultRepo?: string; onError?: (m: string) => void }) {
   const [repo, setRepo] = useState(defaultRepo || '')
   const [instr, setInstr] = useState('Fix failing pytest tests')
@@ -51,27 +65,47 @@ export function Tasks({ base, defaultRepo, onError }: { base: string; defaultRep
     wsRef.current = ws
     ws.onmessage = ev => {
       try {
-        const data: StreamEvent = JSON.parse(ev.data)
-        if (data.type) {
-          setTimeline(tl => [...tl, data])
-        }
-        if (data.stdout || data.stderr) {
-          const line = (data.stdout || '') + (data.stderr || '')
-          if (line) setLogs(l => [...l, line])
-        }
-        if (data.diff) {
-          const before = typeof data.diff.before === 'string' ? data.diff.before : ''
-          const after = typeof data.diff.after === 'string' ? data.diff.after : data.diff
-          setDiff({ original: before, modified: after })
-        }
-        if (data.cost) {
-          setCost(c => ({
-            calls: data.cost?.calls ?? c.calls,
-            tokens: data.cost?.tokens ?? c.tokens,
-          }))
-        }
+        const parsed: StreamEvent | StreamEvent[] = JSON.parse(ev.data)
+        // the backend batches bursts of events into a single array frame
+        const events = Array.isArray(parsed) ? parsed : [parsed]
+        events.forEach(handleEvent)
       } catch (e) {}
     }
+    function backfill(after: number, last: number) {
+      // the stream dropped events after..last for this slow viewer; page them from the job log
+      fetch(`${base}/tasks/${jobId}?after=${after}&limit=${Math.min(BACKFILL_PAGE, last - after)}`)
+        .then(r => r.json())
+        .then(d => {
+          ;(d.logs || []).filter((e: StreamEvent) => (e.seq ?? 0) <= last).forEach(handleEvent)
+          const next = typeof d.next === 'number' ? d.next : after
+          if (next > after && next < last) backfill(next, last)
+        })
+        .catch(() => {})
+    }
+    function handleEvent(data: StreamEvent) {
+      if (data.type === 'dropped' && data.first_seq != null && data.last_seq != null) {
+        backfill(data.first_seq - 1, data.last_seq)
+        return
+      }
+      if (data.type) {
+        setTimeline(tl => insertBySeq(tl, data))
+      }
+      if (data.stdout || data.stderr) {
+        const line = (data.stdout || '') + (data.stderr || '')
+        if (line) setLogs(l => [...l, line])
+      }
+      if (data.diff) {
+        const before = typeof data.diff.before === 'string' ? data.diff.before : ''
+        const after = typeof data.diff.after === 'string' ? data.diff.after : data.diff
+        setDiff({ original: before, modified: after })
+      }
+      if (data.cost) {
+        setCost(c => ({
+          calls: data.cost?.calls ?? c.calls,
+          tokens: data.cost?.tokens ?? c.tokens,
+        }))
+      }
+    }
     ws.onclose = () => {
       wsRef.current = null
       if (jobId) onError && onError('Connection lost')
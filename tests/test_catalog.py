@@ -0,0 +1,43 @@
+import json
+
+from training.catalog import Shard
+
+
+def _write(path, values, mode="w"):
+    with open(path, mode) as fh:
+        for v in values:
+            fh.write(json.dumps({"v": v}) + "\n")
+
+
+def test_shard_index_follows_append_truncate_and_rewrite(tmp_path):
+    path = tmp_path / "s.jsonl"
+    _write(path, range(10))
+    assert len(Shard(str(path))) == 10
+
+    # append: reopened shard extends the sidecar
+    _write(path, range(10, 15), mode="a")
+    shard = Shard(str(path))
+    assert len(shard) == 15
+    assert shard.get(12) == {"v": 12}
+
+    # truncate
+    _write(path, range(3))
+    shard = Shard(str(path))
+    assert len(shard) == 3
+    assert [r["v"] for r in shard] == [0, 1, 2]
+
+    # rewrite in place to a larger file with different record boundaries
+    _write(path, [f"record-{i}" * (i % 4 + 1) for i in range(8)])
+    shard = Shard(str(path))
+    assert len(shard) == 8
+    assert shard.get(5) == {"v": "record-5" * 2}
+
+
+def test_cached_shard_detects_rewrite(tmp_path):
+    path = tmp_path / "s.jsonl"
+    _write(path, ["aa", "bb", "cc"])
+    shard = Shard(str(path))
+    _write(path, ["a", "bbb", "cc"])  # same size, different offsets
+    shard.refresh()
+    assert len(shard) == 3
+    assert shard.get(1) == {"v": "bbb"}
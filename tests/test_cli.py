@@ -0,0 +1,17 @@
+import eval.run_eval
+from orchestrator import cli
+
+
+def test_eval_passes_options_through(monkeypatch):
+    seen = []
+    monkeypatch.setattr(eval.run_eval, "main", lambda argv: seen.append(argv))
+
+    assert cli.main(["eval", "--workers", "2", "--limit", "0"]) == 0
+    assert cli.main(["eval", "--", "--seed", "3"]) == 0
+    assert cli.main(["eval"]) == 0
+    assert seen == [["--workers", "2", "--limit", "0"], ["--seed", "3"], []]
+
+
+def test_query_args_still_parsed():
+    args = cli.build_parser().parse_args(["query", "add", "-k", "3"])
+    assert (args.query, args.k, args.func) == ("add", 3, cli.cmd_query)
@@ -0,0 +1,57 @@
+import asyncio
+
+from backend.events import EventBus, Subscriber
+
+
+def _batch(sub):
+    return asyncio.run(sub.get_batch())
+
+
+def test_coalesce_merges_consecutive_log_events():
+    sub = Subscriber(8)
+    sub.put({"type": "log", "message": "a", "seq": 1})
+    sub.put({"type": "log", "message": "b", "seq": 2})
+    sub.put({"type": "patch", "message": "p", "seq": 3})
+    sub.put({"type": "test", "message": "t1", "stdout": "x", "seq": 4})
+    sub.put({"type": "test", "message": "t2", "stdout": "y", "seq": 5})
+    assert _batch(sub) == [
+        {"type": "log", "message": "a\nb", "seq": 2, "first_seq": 1, "coalesced": 2},
+        {"type": "patch", "message": "p", "seq": 3},
+        {"type": "test", "message": "t1\nt2", "stdout": "x\ny", "seq": 5, "first_seq": 4, "coalesced": 2},
+    ]
+
+
+def test_dropped_marker_reports_seq_range():
+    sub = Subscriber(2, policy="drop")
+    for seq in range(1, 7):
+        sub.put({"type": "log", "message": str(seq), "seq": seq})
+    batch = _batch(sub)
+    assert batch[0] == {"type": "dropped", "count": 4, "first_seq": 1, "last_seq": 4}
+    assert [e["seq"] for e in batch[1:]] == [5, 6]
+    sub.put({"type": "log", "message": "7", "seq": 7})
+    assert _batch(sub) == [{"type": "log", "message": "7", "seq": 7}]  # marker reset
+
+
+def test_dropped_range_starts_at_first_seq_of_coalesced_event():
+    sub = Subscriber(2)
+    for seq, typ in enumerate(["log", "log", "patch", "iter"], 1):
+        sub.put({"type": typ, "message": str(seq), "seq": seq})
+    batch = _batch(sub)
+    assert batch[0] == {"type": "dropped", "count": 1, "first_seq": 1, "last_seq": 2}
+    assert [e["seq"] for e in batch[1:]] == [3, 4]
+
+
+def test_bus_delivers_from_other_threads_and_closes():
+    async def main():
+        bus = EventBus(maxsize=16, policy="drop")
+        sub = bus.subscribe()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: [bus.publish({"type": "iter", "seq": i}) for i in (1, 2)])
+        first = await sub.get_batch()
+        bus.close()
+        await asyncio.sleep(0)
+        return first, await sub.get_batch()
+
+    first, after_close = asyncio.run(main())
+    assert [e["seq"] for e in first] == [1, 2]
+    assert after_close == []
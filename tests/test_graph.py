@@ -0,0 +1,70 @@
+import orchestrator.graph as graph
+from orchestrator.graph import Orchestrator, failure_signature, patch_key
+from orchestrator.tools import Patch
+
+PYTEST_OUT = """\
+tests/t.py:4: in test_a
+    assert add(1, 2) == 3
+E   AssertionError: assert 4 == 3
+=========================== short test summary info ============================
+FAILED tests/t.py::test_a - AssertionError: assert 4 == 3
+1 failed in 0.04s
+"""
+
+
+class SamePatchLLM:
+    scope = None
+
+    def complete_json(self, system, user):
+        return {"action": "implement", "target": "add"}
+
+    def propose_patch(self, task, snippets, trace=None, history=None):
+        return Patch(repo_path=".", diff="```src/m.py\ndef add(a, b):\n    return a + b + 1\n```")
+
+
+class FailingSandbox:
+    def __init__(self):
+        self.applied = 0
+        self.test_runs = 0
+
+    def apply_patch(self, patch):
+        self.applied += 1
+        return True
+
+    def run_tests(self):
+        self.test_runs += 1
+        return {"ok": False, "code": 1, "stdout": PYTEST_OUT, "stderr": ""}
+
+
+def test_failure_signature_from_pytest_output():
+    assert failure_signature({"ok": False, "code": 1, "stdout": PYTEST_OUT}) == "tests/t.py::test_a AssertionError"
+    assert failure_signature({"ok": False, "code": 2, "stdout": ""}) == "exit 2"
+
+
+def test_patch_key_ignores_whitespace_and_index_lines():
+    diff = "diff --git a/m.py b/m.py\nindex 1234..5678 100644\n-a\n+b\n"
+    assert patch_key(diff) == patch_key("diff --git a/m.py b/m.py  \r\nindex abcd..ef01\n\n-a\n+b")
+    assert patch_key(diff) != patch_key(diff.replace("+b", "+c"))
+
+
+def test_repeated_patch_is_tested_once_then_stalls(monkeypatch):
+    monkeypatch.setenv("MAX_ITERS", "3")
+    monkeypatch.setenv("USE_AIDER", "false")
+    monkeypatch.setattr(graph, "build_index", lambda root: 0)
+    monkeypatch.setattr(graph, "query_symbols", lambda q, k=8: [])
+    events = []
+    sandbox = FailingSandbox()
+
+    io = Orchestrator(SamePatchLLM(), sandbox, on_event=events.append).run_once("make add correct")
+
+    assert sandbox.test_runs == 1
+    assert sandbox.applied == 1
+    assert [(a["iter"], a["stage"], a["result"]) for a in io.attempts] == [
+        (1, "implement", "tests/t.py::test_a AssertionError"),
+        (1, "repair", "skipped"),
+        (2, "implement", "skipped"),
+        (2, "repair", "skipped"),
+    ]
+    types = [e["type"] for e in events]
+    assert types.count("patch_duplicate") == 3
+    assert types[-1] == "stalled"
@@ -0,0 +1,47 @@
+import os
+import time
+
+import pytest
+
+from backend.joblog import CHECKPOINT_EVERY, JobLog, sweep_logs
+
+N_EVENTS = 1000
+RING = 10  # events 991..1000 stay in memory, the rest come from disk
+
+
+@pytest.fixture
+def log(tmp_path):
+    jl = JobLog("job", ring_size=RING, log_dir=str(tmp_path))
+    for i in range(1, N_EVENTS + 1):
+        assert jl.append({"type": "log", "message": f"m{i}"})["seq"] == i
+    yield jl
+    jl.close()
+
+
+@pytest.mark.parametrize("after", [0, 1, CHECKPOINT_EVERY - 1, CHECKPOINT_EVERY, 2 * CHECKPOINT_EVERY - 1,
+                                   N_EVENTS - RING - 1, N_EVENTS - RING, N_EVENTS - 1])
+@pytest.mark.parametrize("limit", [1, 5, 300])
+def test_read_pages_across_ring_and_disk(log, after, limit):
+    got = log.read(after, limit)
+    want = list(range(after + 1, min(N_EVENTS, after + limit) + 1))
+    assert [e["seq"] for e in got] == want
+    assert all(e["message"] == f"m{e['seq']}" for e in got)
+
+
+def test_read_edges(log):
+    assert log.read(N_EVENTS, 10) == []
+    assert log.read(-5, 2)[0]["seq"] == 1
+    assert log.read(0, 0) == []
+    log.close()  # closing stops appends but keeps the log readable
+    assert [e["seq"] for e in log.read(500, 2)] == [501, 502]
+
+
+def test_sweep_logs_removes_only_old_job_logs(tmp_path):
+    now = time.time()
+    for name, age in (("old.jsonl", 7200), ("fresh.jsonl", 10), ("old.txt", 7200)):
+        path = tmp_path / name
+        path.write_text("{}\n")
+        os.utime(path, (now - age, now - age))
+    assert sweep_logs(3600, str(tmp_path)) == 1
+    assert sorted(os.listdir(tmp_path)) == ["fresh.jsonl", "old.txt"]
+    assert sweep_logs(3600, str(tmp_path / "missing")) == 0
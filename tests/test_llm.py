@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from orchestrator.tools import LLMClient, ReplayMiss
+
+
+def test_failed_calls_count_toward_usage(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("LLM_REPLAY", raising=False)
+    monkeypatch.delenv("LLM_RECORD", raising=False)
+    llm = LLMClient()
+
+    def unreachable(*args, **kwargs):
+        raise TimeoutError("model host unreachable")
+
+    monkeypatch.setattr(llm, "_ollama_chat", unreachable)
+    assert llm.complete("s", "u") == ""
+    assert llm.complete_json("s", "u")["notes"] == "offline-fallback"
+    assert llm.usage["calls"] == 2
+    assert llm.usage["errors"] == 2
+    assert llm.usage["seconds"] > 0
+
+
+def _replay_client(monkeypatch, tmp_path, strict):
+    path = tmp_path / "rec.jsonl"
+    path.write_text(json.dumps({"kind": "chat", "scope": "goal", "key": "k", "response": "recorded"}) + "\n")
+    monkeypatch.setenv("LLM_REPLAY", str(path))
+    monkeypatch.setenv("LLM_REPLAY_STRICT", "true" if strict else "false")
+    llm = LLMClient()
+    llm.scope = "goal"
+    return llm
+
+
+def test_replay_miss_is_counted(monkeypatch, tmp_path):
+    llm = _replay_client(monkeypatch, tmp_path, strict=False)
+    assert llm.complete("s", "u") == "recorded"  # fallback within the same goal
+    assert llm.complete("s", "u") == ""
+    assert llm.complete_json("s", "u")["notes"] == "offline-fallback"
+    assert llm.usage["replay_misses"] == 2
+
+
+def test_strict_replay_raises_on_miss(monkeypatch, tmp_path):
+    llm = _replay_client(monkeypatch, tmp_path, strict=True)
+    llm.scope = "other goal"
+    with pytest.raises(ReplayMiss):
+        llm.complete("s", "u")
@@ -0,0 +1,50 @@
+import os
+
+from eval.snapshot import Snapshot
+from orchestrator.tools import Patch, SandboxClient
+
+
+def _make_repo(root):
+    os.makedirs(root / "src" / "ui")
+    os.makedirs(root / "data" / "task_to_patch")
+    (root / "src" / "ui" / "Tasks.tsx").write_text("export const a = 1\n")
+    (root / "data" / "task_to_patch" / "t.jsonl").write_text('{"prompt": "x"}\n')
+
+
+def test_fenced_patch_in_workspace_leaves_source_untouched(tmp_path, monkeypatch):
+    src, ws = tmp_path / "src_repo", tmp_path / "ws"
+    _make_repo(src)
+    snap = Snapshot(root=str(src))
+    snap.materialize(str(ws))
+    monkeypatch.chdir(ws)
+
+    patch = "```src/ui/Tasks.tsx\nexport const a = 2\n```\n\n```data/task_to_patch/t.jsonl\n{}\n```"
+    assert SandboxClient().apply_patch(Patch(repo_path=str(ws), diff=patch))
+
+    assert (ws / "src" / "ui" / "Tasks.tsx").read_text() == "export const a = 2"
+    assert (src / "src" / "ui" / "Tasks.tsx").read_text() == "export const a = 1\n"
+    # data/ is hardlinked, but the atomic write must not go through the shared inode
+    assert (src / "data" / "task_to_patch" / "t.jsonl").read_text() == '{"prompt": "x"}\n'
+
+    assert snap.reset(str(ws)) == 2
+    assert (ws / "src" / "ui" / "Tasks.tsx").read_text() == "export const a = 1\n"
+
+
+def test_change_metrics_diff_rewritten_file(tmp_path, monkeypatch):
+    from eval.run_eval import change_metrics
+
+    src, ws = tmp_path / "src_repo", tmp_path / "ws"
+    _make_repo(src)
+    snap = Snapshot(root=str(src))
+    snap.materialize(str(ws))
+    monkeypatch.chdir(ws)
+
+    patch = "```src/ui/Tasks.tsx\nexport const b = 2\nexport const c = 3\n```"
+    SandboxClient().apply_patch(Patch(repo_path=str(ws), diff=patch))
+
+    stats = change_metrics(snap, str(ws))
+    assert stats["files_touched"] == 1
+    assert stats["lines_removed"] == 1
+    assert stats["lines_added"] == 2
+    assert stats["hunks"] == 1
+    assert stats["shared_writes"] == 0
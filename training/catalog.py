@@ -0,0 +1,226 @@
+"""
+offset-indexed catalog over the data/ JSONL corpora
+
+Each .jsonl shard gets a sidecar `<shard>.idx` holding the byte offset of every record,
+so counts are O(1), any record can be read with one seek, and seeded sampling reads
+only the sampled records. Sidecars are extended incrementally when a shard is
+appended to. The header records the shard's inode and mtime plus a fingerprint of the
+indexed bytes (the first block and the last indexed record); if the shard was replaced,
+truncated or rewritten the fingerprint no longer matches and the index is rebuilt.
+Single-record .json files are supported as one-record shards. Eval and training share
+the same iterators.
+"""
+from __future__ import annotations
+import bisect
+import hashlib
+import json
+import os
+import random
+import struct
+from array import array
+from typing import Any, Dict, Iterator, List, Optional
+
+DATA_ROOT = "data"
+IDX_SUFFIX = ".idx"
+_MAGIC = b"AICIDX02"
+# magic, bytes of the shard covered by the index, inode, mtime_ns, fingerprint of the covered bytes
+_HEADER = struct.Struct("<8sQQQ20s")
+_HEAD_BYTES = 4096
+
+
+class Shard:
+    def __init__(self, path: str):
+        self.path = path
+        self.offsets = array("Q")
+        self._covered: Optional[int] = None  # shard bytes covered by self.offsets
+        self._stamp = (0, 0)  # (inode, mtime_ns) of the shard when last indexed
+        self._fingerprint = b""
+        self._single = path.endswith(".json")
+        if self._single:
+            self.offsets.append(0)
+        else:
+            self.refresh()
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def index_path(self) -> str:
+        return self.path + IDX_SUFFIX
+
+    def refresh(self) -> int:
+        """Bring the sidecar index up to date; returns the number of new records."""
+        if self._single:
+            return 0
+        st = os.stat(self.path)
+        covered = self._load_index()
+        if covered and (st.st_ino, st.st_mtime_ns, st.st_size) == (*self._stamp, covered):
+            return 0  # untouched since it was indexed
+        if covered and (
+            covered > st.st_size or st.st_ino != self._stamp[0] or self._fingerprint_of(covered) != self._fingerprint
+        ):
+            # shard was replaced, truncated or rewritten; start over
+            self.offsets = array("Q")
+            self._covered = covered = 0
+        before = len(self.offsets)
+        covered = self._scan(covered)
+        self._stamp = (st.st_ino, st.st_mtime_ns)
+        self._fingerprint = self._fingerprint_of(covered)
+        self._save_index(covered)
+        return len(self.offsets) - before
+
+    def _fingerprint_of(self, covered: int) -> bytes:
+        """sha1 of the first block and the last indexed record of the shard."""
+        h = hashlib.sha1()
+        if not covered or not self.offsets:
+            return h.digest()
+        with open(self.path, "rb") as fh:
+            h.update(fh.read(min(covered, _HEAD_BYTES)))
+            fh.seek(self.offsets[-1])
+            h.update(fh.read(covered - self.offsets[-1]))
+        return h.digest()
+
+    def _load_index(self) -> int:
+        if self._covered is not None:
+            return self._covered
+        try:
+            with open(self.index_path, "rb") as fh:
+                magic, covered, ino, mtime_ns, fingerprint = _HEADER.unpack(fh.read(_HEADER.size))
+                if magic != _MAGIC:
+                    self._covered = 0
+                    return 0
+                n = (os.fstat(fh.fileno()).st_size - _HEADER.size) // self.offsets.itemsize
+                self.offsets.fromfile(fh, n)
+        except (OSError, struct.error, EOFError):
+            self.offsets = array("Q")
+            self._covered = 0
+            return 0
+        self._covered = covered
+        self._stamp = (ino, mtime_ns)
+        self._fingerprint = fingerprint
+        return covered
+
+    def _scan(self, start: int) -> int:
+        """Index records from byte `start`; returns the offset just past the last complete record."""
+        covered = start
+        with open(self.path, "rb") as fh:
+            fh.seek(start)
+            pos = start
+            for line in fh:
+                nxt = pos + len(line)
+                if not line.endswith(b"\n"):
+                    # unterminated tail: index it only if it is already a whole record
+                    try:
+                        json.loads(line)
+                    except ValueError:
+                        break
+                if line.strip():
+                    self.offsets.append(pos)
+                pos = covered = nxt
+        self._covered = covered
+        return covered
+
+    def _save_index(self, covered: int):
+        tmp = self.index_path + ".tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                fh.write(_HEADER.pack(_MAGIC, covered, *self._stamp, self._fingerprint))
+                self.offsets.tofile(fh)
+            os.replace(tmp, self.index_path)
+        except OSError:
+            pass  # read-only data dir: the in-memory index still works
+
+    def get(self, i: int) -> Dict[str, Any]:
+        with open(self.path, "rb") as fh:
+            if self._single:
+                return json.load(fh)
+            fh.seek(self.offsets[i])
+            return json.loads(fh.readline())
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, "rb") as fh:
+            if self._single:
+                yield json.load(fh)
+                return
+            for off in self.offsets:
+                fh.seek(off)
+                yield json.loads(fh.readline())
+
+
+class Dataset:
+    """All shards under one data/ subdirectory, addressed as a single sequence."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.shards: List[Shard] = []
+        self._starts: List[int] = []
+        self._total = 0
+        self.refresh()
+
+    def refresh(self) -> int:
+        """Pick up new shards and appended records; returns the number of new records."""
+        known = {s.path: s for s in self.shards}
+        shards: List[Shard] = []
+        added = 0
+        for base, _, files in os.walk(self.path):
+            for f in files:
+                if not (f.endswith(".jsonl") or f.endswith(".json")):
+                    continue
+                path = os.path.join(base, f)
+                try:
+                    shard = known.get(path)
+                    if shard is None:
+                        shard = Shard(path)
+                        added += len(shard)
+                    else:
+                        added += shard.refresh()
+                except OSError:
+                    continue
+                shards.append(shard)
+        self.shards = sorted(shards, key=lambda s: s.path)
+        self._reindex()
+        return added
+
+    def _reindex(self):
+        self._starts, total = [], 0
+        for shard in self.shards:
+            self._starts.append(total)
+            total += len(shard)
+        self._total = total
+
+    def __len__(self) -> int:
+        return self._total
+
+    def get(self, i: int) -> Dict[str, Any]:
+        if not 0 <= i < self._total:
+            raise IndexError(i)
+        s = bisect.bisect_right(self._starts, i) - 1
+        return self.shards[s].get(i - self._starts[s])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for shard in self.shards:
+            yield from shard
+
+    def sample(self, k: int, seed: int = 0) -> List[Dict[str, Any]]:
+        """k records chosen uniformly without replacement, reproducible for a seed."""
+        picks = random.Random(seed).sample(range(self._total), min(k, self._total))
+        return [self.get(i) for i in picks]
+
+
+class Catalog:
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("DATA_ROOT", DATA_ROOT)
+        self._datasets: Dict[str, Dataset] = {}
+
+    def dataset(self, name: str) -> Dataset:
+        ds = self._datasets.get(name)
+        if ds is None:
+            ds = self._datasets[name] = Dataset(os.path.join(self.root, name))
+        else:
+            ds.refresh()
+        return ds
+
+    def stats(self, names: Optional[List[str]] = None) -> Dict[str, int]:
+        if names is None:
+            names = sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+        return {name: len(self.dataset(name)) for name in names}